@@ -1,118 +1,245 @@
 import os
-from typing import Dict, List, Any, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Any, Literal, Mapping, Optional
 from fastapi import FastAPI, Request, Response, Header, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.datastructures import Headers
 import uvicorn
-import json
+import orjson
+import ijson
 import time
 import uuid
+import itertools
+import secrets
+import hmac
 import asyncio
+import re
+import io
 from datetime import datetime, timezone
-from pydantic import BaseModel
-import requests
+from pydantic import BaseModel, model_validator
+from cachetools import TTLCache
+import httpx
+import jwt
 import logging
+import logging.handlers
+import queue
+import copy
+from pythonjsonlogger.json import JsonFormatter
 
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure detailed logging - records are handed to a background listener
+# thread, which formats them and writes them to stderr, so the event loop only
+# pays for a queue put
+class ThreadQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the record on the calling thread so it can be
+    pickled for a multiprocessing queue; an in-process queue can carry the
+    record (args, exc_info and all) as is.
+    """
+    def prepare(self, record):
+        return copy.copy(record)
+
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(JsonFormatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, log_handler, respect_handler_level=True)
+log_listener.start()
+logging.getLogger().handlers = [ThreadQueueHandler(log_queue)]
+logging.getLogger().setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
+class LazyJSON:
+    """Defers JSON encoding of a logged value until the record is actually formatted"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return orjson.dumps(self.value, default=self._default).decode()
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, BaseModel):
+            return obj.model_dump()
+        raise TypeError
+
+# Credential-bearing headers whose values are never written to the logs
+REDACTED_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "set-cookie"})
+
+def loggable_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    """Copy headers for logging, masking the values of credential headers"""
+    return {
+        name: "[REDACTED]" if name.lower() in REDACTED_HEADERS else value
+        for name, value in headers.items()
+    }
+
+# Request ids only need to tell concurrent requests apart in this process's logs
+request_id_counter = itertools.count()
+
+def next_request_id() -> str:
+    return format(next(request_id_counter), '08x')
+
+# Shared async HTTP client for upstream calls - keeps TCP/TLS connections alive
+# across requests and never blocks the event loop. HTTP/2 multiplexes concurrent
+# requests over one connection, and idle connections survive gaps between chats
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    verify=True,
+    limits=httpx.Limits(max_keepalive_connections=50, max_connections=50, keepalive_expiry=300)
+)
+
 # Request/Response logging middleware
-class RequestResponseLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Log incoming request
+class RequestResponseLoggingMiddleware:
+    """Pure ASGI middleware that logs requests and responses.
+
+    The request stream is passed through untouched and the response is observed
+    via the send messages, so nothing is buffered and streaming keeps working.
+    The body is read once by FastAPI, which caches it on the Request, so there
+    is no need to replay it through a replacement receive callable.
+    """
+    # At DEBUG level, log at most this many bytes of each request body
+    LOG_BODY_LIMIT = 500
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
-        request_id = str(uuid.uuid4())[:8]
+        request_id = next_request_id()
+        # Share the id with the route handlers (via request.state) so their log
+        # lines can be matched to this request's record
+        scope.setdefault("state", {})["request_id"] = request_id
+        
+        # Collect everything about the request into a single structured record;
+        # the headers are only copied when the INFO record will be emitted
+        log_details = logger.isEnabledFor(logging.INFO)
+        record = {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+        }
+        if log_details:
+            record["query_string"] = scope["query_string"].decode("latin-1")
+            record["request_headers"] = loggable_headers(Headers(scope=scope))
         
-        # Log request details (without consuming body for streaming compatibility)
-        logger.info(f"[{request_id}] INCOMING REQUEST")
-        logger.info(f"[{request_id}] Method: {request.method}")
-        logger.info(f"[{request_id}] URL: {request.url}")
-        logger.info(f"[{request_id}] Path: {request.url.path}")
-        logger.info(f"[{request_id}] Query Params: {dict(request.query_params)}")
-        logger.info(f"[{request_id}] Headers: {dict(request.headers)}")
+        # At DEBUG level, keep a bounded prefix of the body as the app reads it;
+        # the messages themselves are handed on unchanged
+        body_prefix = bytearray()
+        body_size = 0
         
-        # Only read body for non-streaming requests to avoid conflicts
-        content_type = request.headers.get("content-type", "")
-        if request.method in ["POST", "PUT", "PATCH"] and "application/json" in content_type:
-            try:
-                # Try to peek at body without consuming it fully
-                body = await request.body()
-                if body:
-                    try:
-                        body_json = json.loads(body.decode('utf-8'))
-                        logger.info(f"[{request_id}] Body (JSON): {json.dumps(body_json, indent=2)}")
-                        
-                        # Recreate request with body for FastAPI to process
-                        async def receive():
-                            return {"type": "http.request", "body": body, "more_body": False}
-                        request._receive = receive
-                        
-                    except json.JSONDecodeError:
-                        logger.info(f"[{request_id}] Body (raw): {body.decode('utf-8', errors='replace')[:500]}...")
-                else:
-                    logger.info(f"[{request_id}] Body: (empty)")
-            except Exception as e:
-                logger.warning(f"[{request_id}] Could not read request body: {e}")
-        else:
-            logger.info(f"[{request_id}] Body: (not logged for this request type)")
+        async def debug_receive():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if len(body_prefix) < self.LOG_BODY_LIMIT:
+                    body_prefix.extend(chunk[:self.LOG_BODY_LIMIT - len(body_prefix)])
+            return message
+        
+        logging_receive = debug_receive if logger.isEnabledFor(logging.DEBUG) else receive
+        
+        async def logging_send(message):
+            if message["type"] == "http.response.start":
+                record["status_code"] = message["status"]
+                if log_details:
+                    record["response_headers"] = loggable_headers(Headers(raw=message.get("headers", [])))
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            
-            # Log response details
-            logger.info(f"[{request_id}] OUTGOING RESPONSE")
-            logger.info(f"[{request_id}] Status Code: {response.status_code}")
-            logger.info(f"[{request_id}] Headers: {dict(response.headers)}")
-            logger.info(f"[{request_id}] Processing Time: {process_time:.3f}s")
-            
-            # Check response type
-            if hasattr(response, 'body_iterator'):
-                logger.info(f"[{request_id}] Response Type: Streaming")
-            else:
-                logger.info(f"[{request_id}] Response Type: Standard")
-            
-            return response
-            
+            await self.app(scope, logging_receive, logging_send)
         except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(f"[{request_id}] REQUEST FAILED")
-            logger.error(f"[{request_id}] Error: {str(e)}")
-            logger.error(f"[{request_id}] Processing Time: {process_time:.3f}s")
+            record["duration_ms"] = round((time.time() - start_time) * 1000, 1)
+            record["error"] = str(e)
+            logger.error("[%s] %s %s failed: %s", request_id, scope["method"], scope["path"], e, extra=record)
             raise
+        
+        record["duration_ms"] = round((time.time() - start_time) * 1000, 1)
+        if body_prefix:
+            record["body"] = body_prefix.decode("utf-8", errors="replace")
+            if body_size > len(body_prefix):
+                record["body"] += "..."
+        logger.info(
+            "[%s] %s %s %s %.1fms", request_id, scope["method"], scope["path"],
+            record.get("status_code"), record["duration_ms"], extra=record
+        )
+
+# Seconds the startup connection warmup may take before it is abandoned
+WARMUP_TIMEOUT = 3.0
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if jwt_validator:
+        try:
+            await jwt_validator.refresh_keys()
+        except Exception as e:
+            logger.error(f"✗ Error loading signing keys from {jwt_validator.jwks_url}: {str(e)}")
+    # Open the upstream connection up front so the first chat request doesn't
+    # pay for the TCP/TLS handshake. This is best-effort, so a slow or
+    # unreachable upstream must not hold up startup for long
+    try:
+        await http_client.head(rh_client.base_url, timeout=WARMUP_TIMEOUT)
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not warm up connection to {rh_client.base_url}: {str(e)}")
+    yield
+    await http_client.aclose()
+    log_listener.stop()
 
 # Initialize FastAPI app
-app = FastAPI(title="Red Hat Console Agent Wrapper")
+app = FastAPI(
+    title="Red Hat Console Agent Wrapper",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
-# Note: Middleware removed to avoid streaming conflicts - logging added directly to endpoints
+app.add_middleware(RequestResponseLoggingMiddleware)
 
 # Define message schema
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant", "system"]
+    content: str
+
 class ChatRequest(BaseModel):
-    messages: List[Dict[str, Any]]
+    messages: List[ChatMessage]
     stream: bool = False
 
+    @model_validator(mode="after")
+    def check_user_message(self):
+        if not any(msg.role == "user" for msg in self.messages):
+            raise ValueError("No user message found")
+        return self
+
 # Red Hat Console API Client
 class RedHatConsoleClient:
     def __init__(self, jwt_token: str = ""):
-        self.api_url = "https://console.redhat.com/api/virtual-assistant-v2/v2/talk"
+        self.base_url = "https://console.redhat.com/"
+        self.api_url = f"{self.base_url}api/virtual-assistant-v2/v2/talk"
         self.jwt_token = jwt_token
-        self.verify_ssl = True
-        
-    def _get_headers(self):
-        return {
+    
+    @property
+    def jwt_token(self):
+        return self._jwt_token
+    
+    @jwt_token.setter
+    def jwt_token(self, jwt_token: str):
+        # Headers only depend on the token, so build them once per token
+        self._jwt_token = jwt_token
+        self._headers = {
             "accept": "application/json",
-            "Authorization": f"Bearer {self.jwt_token}",
+            "Authorization": f"Bearer {jwt_token}",
             "Content-Type": "application/json"
         }
     
     async def send_message(self, message: str):
         """Send a message to the Red Hat Console API"""
-        headers = self._get_headers()
+        headers = self._headers
         
         payload = {
             "input": {
@@ -124,20 +251,23 @@ class RedHatConsoleClient:
         logger.info("=== OUTGOING REQUEST TO RED HAT CONSOLE API ===")
         logger.info(f"Method: POST")
         logger.info(f"URL: {self.api_url}")
-        logger.info(f"Headers: {headers}")
-        logger.info(f"Body: {json.dumps(payload, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Headers: {loggable_headers(headers)}")
+        logger.info("Body: %s", LazyJSON(payload))
         
         try:
             start_time = time.time()
-            response = requests.post(self.api_url, headers=headers, json=payload, verify=self.verify_ssl)
+            response = await http_client.post(self.api_url, headers=headers, json=payload)
             response_time = time.time() - start_time
             
             # Log response from Red Hat Console API
             logger.info("=== RESPONSE FROM RED HAT CONSOLE API ===")
             logger.info(f"Status Code: {response.status_code}")
             logger.info(f"Response Time: {response_time:.3f}s")
-            logger.info(f"Response Headers: {dict(response.headers)}")
-            logger.info(f"Response Body: {response.text}")
+            if logger.isEnabledFor(logging.INFO):
+                # Copying the headers and decoding the body aren't free
+                logger.info(f"Response Headers: {loggable_headers(response.headers)}")
+                logger.info(f"Response Body: {response.text}")
             
             return response
         except Exception as e:
@@ -149,6 +279,87 @@ ARH_JWT_TOKEN = os.getenv("ARH_JWT_TOKEN", "")
 
 # Authentication configuration
 REQUIRED_BEARER_TOKEN = os.getenv("AGENT_BEARER_TOKEN", "arh-agent-7f8e9d2c-4b6a-41e3-9f2d-8c7b5a4e1f9c")
+REQUIRED_BEARER_TOKEN_BYTES = REQUIRED_BEARER_TOKEN.encode()
+
+# Optional: when set, client bearer tokens are validated as JWTs signed by a key
+# from this JWKS endpoint instead of being compared against AGENT_BEARER_TOKEN
+AGENT_JWKS_URL = os.getenv("AGENT_JWKS_URL", "")
+AGENT_JWT_AUDIENCE = os.getenv("AGENT_JWT_AUDIENCE") or None
+AGENT_JWT_ISSUER = os.getenv("AGENT_JWT_ISSUER") or None
+
+# Offline JWT validator for client bearer tokens
+class JWTValidator:
+    # Minimum time between JWKS fetches triggered by unknown key ids
+    KEY_REFRESH_INTERVAL = 60
+    # Maximum number of verified tokens remembered until they expire
+    MAX_VERIFIED_TOKENS = 1024
+    
+    def __init__(self, jwks_url: str, audience: Optional[str] = None, issuer: Optional[str] = None):
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer
+        self.keys_by_kid: Dict[Optional[str], jwt.PyJWK] = {}
+        self._last_refresh = 0.0
+        # Raw token -> exp claim, so repeat requests skip signature verification
+        self._verified_tokens: Dict[str, float] = {}
+    
+    async def refresh_keys(self):
+        """Fetch the JWKS and cache its signing keys by key id"""
+        self._last_refresh = time.time()
+        response = await http_client.get(self.jwks_url)
+        response.raise_for_status()
+        jwks = jwt.PyJWKSet.from_dict(orjson.loads(response.content))
+        # Only RS256 tokens are accepted, so keys of any other type are dropped;
+        # keeping the PyJWK lets PyJWT check the token's alg against the key's
+        self.keys_by_kid = {key.key_id: key for key in jwks.keys if key.key_type == "RSA"}
+        logger.info(f"Loaded {len(self.keys_by_kid)} signing keys from {self.jwks_url}")
+    
+    async def verify(self, token: str):
+        """Verify the token signature and claims, raising jwt.PyJWTError if invalid"""
+        now = time.time()
+        exp = self._verified_tokens.get(token)
+        if exp is not None and exp > now:
+            return
+        
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys_by_kid.get(kid)
+        if key is None and now - self._last_refresh > self.KEY_REFRESH_INTERVAL:
+            # The signing keys may have been rotated since they were last fetched
+            await self.refresh_keys()
+            key = self.keys_by_kid.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+        
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"require": ["exp", "iat"], "verify_aud": self.audience is not None}
+        )
+        # Reject refresh/ID tokens issued by the same identity provider
+        if claims.get("typ", "Bearer") != "Bearer":
+            raise jwt.InvalidTokenError(f"Unexpected token type: {claims['typ']}")
+        
+        if len(self._verified_tokens) >= self.MAX_VERIFIED_TOKENS:
+            self._verified_tokens = {t: e for t, e in self._verified_tokens.items() if e > now}
+            if len(self._verified_tokens) >= self.MAX_VERIFIED_TOKENS:
+                self._verified_tokens.clear()
+        self._verified_tokens[token] = claims["exp"]
+
+jwt_validator = JWTValidator(AGENT_JWKS_URL, AGENT_JWT_AUDIENCE, AGENT_JWT_ISSUER) if AGENT_JWKS_URL else None
+
+# Response cache configuration - identical queries within the TTL are answered
+# without calling the Red Hat Console API (a TTL of 0 disables the cache)
+ARH_RESPONSE_CACHE_TTL = int(os.getenv("ARH_RESPONSE_CACHE_TTL", "300"))
+ARH_RESPONSE_CACHE_SIZE = int(os.getenv("ARH_RESPONSE_CACHE_SIZE", "512"))
+response_cache = TTLCache(maxsize=ARH_RESPONSE_CACHE_SIZE, ttl=ARH_RESPONSE_CACHE_TTL) if ARH_RESPONSE_CACHE_TTL > 0 else None
+inflight_queries: Dict[str, asyncio.Task] = {}
+
+# Queries mentioning emails, IP addresses or long numbers (account, case or
+# subscription ids) carry per-user context and always bypass the cache
+PERSONAL_CONTEXT_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+|\b(?:\d{1,3}\.){3}\d{1,3}\b|\d{5,}")
 
 # Initialize Red Hat Console client
 rh_client = RedHatConsoleClient(ARH_JWT_TOKEN)
@@ -156,7 +367,7 @@ rh_client = RedHatConsoleClient(ARH_JWT_TOKEN)
 # Note: Red Hat Console API doesn't require conversation management
 
 # Authentication dependency
-def verify_bearer_token(authorization: str = Header(None)):
+async def verify_bearer_token(authorization: str = Header(None)):
     """Verify the Bearer token in the Authorization header"""
     if not authorization:
         raise HTTPException(
@@ -173,7 +384,22 @@ def verify_bearer_token(authorization: str = Header(None)):
         )
     
     token = authorization[7:]  # Remove "Bearer " prefix
-    if token != REQUIRED_BEARER_TOKEN:
+    if jwt_validator:
+        try:
+            await jwt_validator.verify(token)
+        except (jwt.PyJWTError, httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Bearer token rejected: {str(e)}")
+            raise HTTPException(
+                status_code=401, 
+                detail="Invalid bearer token",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        return token
+    
+    token_bytes = token.encode()
+    # Constant-time compare so the token can't be recovered through response timing
+    if (len(token_bytes) != len(REQUIRED_BEARER_TOKEN_BYTES) or
+            not hmac.compare_digest(token_bytes, REQUIRED_BEARER_TOKEN_BYTES)):
         raise HTTPException(
             status_code=401, 
             detail="Invalid bearer token",
@@ -182,66 +408,45 @@ def verify_bearer_token(authorization: str = Header(None)):
     
     return token
 
+# Agent discovery response - identical for every request, so serialize it once
+AGENTS_RESPONSE_BODY = orjson.dumps({
+    "agents": [
+        {
+            "name": "Red Hat Console Agent",
+            "description": "Connects to the Red Hat Console Virtual Assistant API for Red Hat product assistance",
+            "provider": {
+                "organization": "Red Hat",
+                "url": "https://redhat.com"
+            },
+            "version": "1.0.0",
+            "documentation_url": "https://access.redhat.com",
+            "capabilities": {
+                "streaming": True
+            }
+        }
+    ]
+})
+
 # Agent discovery endpoint
 @app.get("/v1/agents")
-async def discover_agents(token: str = Depends(verify_bearer_token)):
-    request_id = str(uuid.uuid4())[:8]
+async def discover_agents(http_request: Request, token: str = Depends(verify_bearer_token)):
+    request_id = http_request.state.request_id
     logger.info(f"[{request_id}] AGENT DISCOVERY REQUEST (authenticated)")
-    
-    response = {
-        "agents": [
-            {
-                "name": "Red Hat Console Agent",
-                "description": "Connects to the Red Hat Console Virtual Assistant API for Red Hat product assistance",
-                "provider": {
-                    "organization": "Red Hat",
-                    "url": "https://redhat.com"
-                },
-                "version": "1.0.0",
-                "documentation_url": "https://access.redhat.com",
-                "capabilities": {
-                    "streaming": True
-                }
-            }
-        ]
-    }
-    
     logger.info(f"[{request_id}] Agent discovery response sent")
-    return response
+    return Response(content=AGENTS_RESPONSE_BODY, media_type="application/json")
 
-# Chat completion endpoint
-@app.post("/v1/chat")
-async def chat_completion(
-    request: ChatRequest, 
-    x_ibm_thread_id: str = Header(None),
-    token: str = Depends(verify_bearer_token)
-):
-    thread_id = x_ibm_thread_id or str(uuid.uuid4())
-    request_id = str(uuid.uuid4())[:8]
-    start_time = time.time()
-    
-    # Log incoming chat request
-    logger.info(f"[{request_id}] CHAT REQUEST (authenticated)")
-    logger.info(f"[{request_id}] Thread ID: {thread_id}")
-    logger.info(f"[{request_id}] Stream: {request.stream}")
-    logger.info(f"[{request_id}] Messages: {json.dumps([msg for msg in request.messages], indent=2)}")
-    
-    # Check if JWT token is configured (optional - will be needed for actual Red Hat Console API calls)
-    if not rh_client.jwt_token:
-        logger.warning(f"[{request_id}] JWT token not configured - API calls to Red Hat Console will likely fail")
-        # Continue anyway - let the Red Hat Console API return its own authentication error
-    
-    # Extract the user query from the messages - handle WatsonX Orchestrate format
-    user_messages = [msg for msg in request.messages if msg["role"] == "user"]
-    if not user_messages:
-        raise HTTPException(status_code=400, detail="No user message found")
-    
-    # For WatsonX Orchestrate, look for the actual user question
-    query = user_messages[-1]["content"]
-    
-    # Red Hat Console API doesn't support streaming, so we always use non-streaming
-    logger.info(f"[{request_id}] Starting response (Red Hat Console API doesn't support streaming)")
-    
+# Upstream bodies larger than this are parsed incrementally, stopping after the
+# first response item; below it a full orjson decode is faster
+PARTIAL_PARSE_THRESHOLD = 256 * 1024
+
+def first_response_item(content: bytes) -> Optional[Dict[str, Any]]:
+    """Parse only the first item of the "response" list from an upstream body"""
+    for item in ijson.items(io.BytesIO(content), 'response.item', use_float=True):
+        return item if isinstance(item, dict) else None
+    return None
+
+async def get_response_content(query: str, request_id: str) -> str:
+    """Send a query to the Red Hat Console API and extract the reply text"""
     # Send message to Red Hat Console API
     response = await rh_client.send_message(query)
     if not response or response.status_code != 200:
@@ -249,17 +454,21 @@ async def chat_completion(
     
     # Parse the response
     try:
-        response_data = response.json()
-        
         # Extract text from Red Hat Console API response format: 
         # {"response": [{"text": "...", "type": "TEXT|OPTIONS", "options": [...]}], ...}
-        if (isinstance(response_data, dict) and 
-            'response' in response_data and 
-            isinstance(response_data['response'], list) and 
-            len(response_data['response']) > 0 and 
-            isinstance(response_data['response'][0], dict)):
-            
-            response_item = response_data['response'][0]
+        response_item = None
+        if len(response.content) > PARTIAL_PARSE_THRESHOLD:
+            response_item = first_response_item(response.content)
+        if response_item is None:
+            response_data = orjson.loads(response.content)
+            if (isinstance(response_data, dict) and 
+                'response' in response_data and 
+                isinstance(response_data['response'], list) and 
+                len(response_data['response']) > 0 and 
+                isinstance(response_data['response'][0], dict)):
+                response_item = response_data['response'][0]
+        
+        if response_item is not None:
             response_content = response_item.get('text', 'No response text')
             
             # Handle OPTIONS type responses with selectable options
@@ -278,13 +487,104 @@ async def chat_completion(
         logger.error(f"[{request_id}] Error parsing response: {str(e)}")
         raise HTTPException(status_code=500, detail="Invalid response from Red Hat Console API")
 
+    return response_content
+
+async def fetch_and_cache_response_content(key: str, query: str, request_id: str) -> str:
+    response_content = await get_response_content(query, request_id)
+    response_cache[key] = response_content
+    return response_content
+
+async def get_cached_response_content(query: str, request_id: str) -> str:
+    """Answer repeated queries from the response cache, sharing in-flight upstream calls"""
+    if response_cache is None or PERSONAL_CONTEXT_PATTERN.search(query):
+        return await get_response_content(query, request_id)
+    
+    key = " ".join(query.lower().split())
+    response_content = response_cache.get(key)
+    if response_content is not None:
+        logger.info(f"[{request_id}] Serving cached response")
+        return response_content
+    
+    # Concurrent misses for the same query wait on a single upstream request
+    task = inflight_queries.get(key)
+    if task is None:
+        task = asyncio.create_task(fetch_and_cache_response_content(key, query, request_id))
+        inflight_queries[key] = task
+        task.add_done_callback(lambda _: inflight_queries.pop(key, None))
+    else:
+        logger.info(f"[{request_id}] Waiting for in-flight request with the same query")
+    # Shield so a disconnecting client doesn't cancel the request for the others
+    return await asyncio.shield(task)
+
+# Non-streaming chat completion body - only the id, created timestamp and
+# JSON-encoded content vary between responses
+CHAT_COMPLETION_TEMPLATE = orjson.dumps({
+    "id": "chatcmpl-__ID__",
+    "object": "chat.completion",
+    "created": "__CREATED__",
+    "model": "red-hat-console-agent",
+    "choices": [
+        {
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": "__CONTENT__"
+            },
+            "finish_reason": "stop"
+        }
+    ]
+}).replace(b'__ID__', b'%s').replace(b'"__CREATED__"', b'%d').replace(b'"__CONTENT__"', b'%s')
+
+# Chat completion endpoint
+@app.post("/v1/chat")
+async def chat_completion(
+    request: ChatRequest, 
+    http_request: Request,
+    x_ibm_thread_id: str = Header(None),
+    token: str = Depends(verify_bearer_token)
+):
+    thread_id = x_ibm_thread_id or uuid.uuid4().hex
+    request_id = http_request.state.request_id
+    start_time = time.time()
+    
+    # Log incoming chat request
+    logger.info(f"[{request_id}] CHAT REQUEST (authenticated)")
+    logger.info(f"[{request_id}] Thread ID: {thread_id}")
+    logger.info(f"[{request_id}] Stream: {request.stream}")
+    logger.info("[%s] Messages: %s", request_id, LazyJSON(request.messages))
+    
+    # Check if JWT token is configured (optional - will be needed for actual Red Hat Console API calls)
+    if not rh_client.jwt_token:
+        logger.warning(f"[{request_id}] JWT token not configured - API calls to Red Hat Console will likely fail")
+        # Continue anyway - let the Red Hat Console API return its own authentication error
+    
+    # Extract the user query from the messages - handle WatsonX Orchestrate format,
+    # where the latest user message is the actual question (ChatRequest validation
+    # guarantees there is at least one)
+    query = next(msg.content for msg in reversed(request.messages) if msg.role == "user")
+    
+    # Red Hat Console API doesn't support streaming, so we always use non-streaming
+    logger.info(f"[{request_id}] Starting response (Red Hat Console API doesn't support streaming)")
+    
+    # Send message to Red Hat Console API (or answer it from the response cache)
+    response_content = await get_cached_response_content(query, request_id)
+
     # Log and return response in appropriate format
     process_time = time.time() - start_time
     logger.info(f"[{request_id}] Response completed in {process_time:.3f}s")
     
     if request.stream:
         # Even though Red Hat Console API doesn't support streaming, we can simulate it
-        # by sending the entire response as a single chunk
+        # by sending the response back in small chunks
+        if len(response_content) <= STREAM_CHUNK_SIZE:
+            # A reply that fits in one chunk has nothing to stream incrementally,
+            # so send the whole event stream as a plain response body
+            logger.info(f"[{request_id}] Sending single-chunk event stream")
+            completion_id = f"chatcmpl-{secrets.token_hex(4)}"
+            return Response(
+                content=b"".join(sse_frames(response_content, completion_id, int(time.time()))),
+                media_type="text/event-stream"
+            )
         logger.info(f"[{request_id}] Simulating streaming response")
         return StreamingResponse(
             simulate_streaming_response(response_content, request_id),
@@ -292,63 +592,81 @@ async def chat_completion(
         )
     else:
         # OpenAI-style chat completion format
-        return {
-            "id": f"chatcmpl-{str(uuid.uuid4())[:8]}",
-            "object": "chat.completion",
-            "created": int(time.time()),
-            "model": "red-hat-console-agent",
-            "choices": [
-                {
-                    "index": 0,
-                    "message": {
-                        "role": "assistant",
-                        "content": response_content
-                    },
-                    "finish_reason": "stop"
-                }
-            ]
-        }
+        body = CHAT_COMPLETION_TEMPLATE % (
+            secrets.token_hex(4).encode(), int(time.time()), orjson.dumps(response_content)
+        )
+        return Response(content=body, media_type="application/json")
+
+# Approximate size of each simulated streaming chunk, in characters
+STREAM_CHUNK_SIZE = 40
+
+def chunk_text(text: str, size: int = STREAM_CHUNK_SIZE):
+    """Split text into ~size-character pieces, breaking on word boundaries where possible"""
+    if not text:
+        # Still emit one (empty) content chunk, as the single-frame stream did
+        yield text
+        return
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            if space > start:
+                end = space + 1
+        yield text[start:end]
+        start = end
+
+def sse_frames(response_content: str, completion_id: str, created_timestamp: int):
+    """Yield the SSE frames of a simulated streaming response, one per content chunk"""
+    # Serialize the chunk envelope once as a bytes template with a %s hole
+    # for the content, so each chunk only JSON-encodes its own text
+    chunk_template = orjson.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created_timestamp,
+        "model": "red-hat-console-agent",
+        "choices": [
+            {
+                "index": 0,
+                "delta": {"content": "__CONTENT__"},
+                "finish_reason": None
+            }
+        ]
+    }).replace(b'"__CONTENT__"', b'%s')
+    
+    for piece in chunk_text(response_content):
+        yield b"data: " + (chunk_template % orjson.dumps(piece)) + b"\n\n"
+    
+    # Send final chunk with finish_reason
+    final_chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created_timestamp,
+        "model": "red-hat-console-agent",
+        "choices": [
+            {
+                "index": 0,
+                "delta": {},
+                "finish_reason": "stop"
+            }
+        ]
+    }
+    yield b"data: " + orjson.dumps(final_chunk) + b"\n\n"
+    yield b"data: [DONE]\n\n"
 
 async def simulate_streaming_response(response_content: str, request_id: str):
     """Simulate streaming response for Red Hat Console API (which doesn't support streaming)"""
-    completion_id = f"chatcmpl-{str(uuid.uuid4())[:8]}"
+    completion_id = f"chatcmpl-{secrets.token_hex(4)}"
     created_timestamp = int(time.time())
     
     try:
         logger.info(f"[{request_id}] Simulating streaming response")
         
-        # Send the entire response as a single chunk
-        chunk_response = {
-            "id": completion_id,
-            "object": "chat.completion.chunk",
-            "created": created_timestamp,
-            "model": "red-hat-console-agent",
-            "choices": [
-                {
-                    "index": 0,
-                    "delta": {"content": response_content},
-                    "finish_reason": None
-                }
-            ]
-        }
-        yield f"data: {json.dumps(chunk_response)}\n\n"
-        
-        # Send final chunk with finish_reason
-        final_chunk = {
-            "id": completion_id,
-            "object": "chat.completion.chunk",
-            "created": created_timestamp,
-            "model": "red-hat-console-agent",
-            "choices": [
-                {
-                    "index": 0,
-                    "delta": {},
-                    "finish_reason": "stop"
-                }
-            ]
-        }
-        yield f"data: {json.dumps(final_chunk)}\n\n"
-        yield f"data: [DONE]\n\n"
+        # Send the response in word-sized pieces, yielding to the event loop
+        # between chunks so each frame is flushed as soon as it is ready
+        for frame in sse_frames(response_content, completion_id, created_timestamp):
+            yield frame
+            await asyncio.sleep(0)
         
         logger.info(f"[{request_id}] Simulated streaming response completed")
         
@@ -361,8 +679,8 @@ async def simulate_streaming_response(response_content: str, request_id: str):
             "model": "red-hat-console-agent",
             "choices": [{"index": 0, "delta": {"content": f"Error: {str(e)}"}, "finish_reason": "stop"}]
         }
-        yield f"data: {json.dumps(error_chunk)}\n\n"
-        yield f"data: [DONE]\n\n"
+        yield b"data: " + orjson.dumps(error_chunk) + b"\n\n"
+        yield b"data: [DONE]\n\n"
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8081)